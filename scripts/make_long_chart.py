@@ -1,29 +1,40 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
 ROOT = Path(__file__).resolve().parents[1]
 OUT = ROOT / "docs" / "outputs"
 
-def _style_ax(ax, title):
-    ax.set_title(title, color="#d4e9f7", fontsize=13, pad=10)
-    ax.set_facecolor("#0b1420")
-    ax.tick_params(colors="#9fb6c7")
-    for s in ax.spines.values():
-        s.set_color("#1c2a3a")
+# ダークテーマは rcParams で一括適用（ワーカープロセスでも import 時に適用される）
+plt.rcParams.update({
+    "figure.facecolor": "#0b1420",
+    "axes.facecolor": "#0b1420",
+    "axes.edgecolor": "#1c2a3a",
+    "xtick.color": "#9fb6c7",
+    "ytick.color": "#9fb6c7",
+})
+
+# (日数, 出力ファイル名, タイトル)
+RANGES = [
+    (7,   "skytech_3_7d.png", "SKYTECH-3 | 7日"),
+    (30,  "skytech_3_1m.png", "SKYTECH-3 | 1ヶ月"),
+    (365, "skytech_3_1y.png", "SKYTECH-3 | 1年"),
+]
 
 def plot_range(levels: pd.Series, days: int, fn: str, title: str):
-    if levels.empty: 
-        return
-    s = levels.copy()
-    s.index = pd.to_datetime(s.index)
-    s = s[s.index >= (s.index.max() - pd.Timedelta(days=days))]
+    # 日付昇順の前提で、期間の開始位置を二分探索で求めて末尾をスライス
+    cutoff = levels.index.max() - pd.Timedelta(days=days)
+    s = levels.iloc[levels.index.searchsorted(cutoff, side="left"):]
     fig, ax = plt.subplots(figsize=(14, 6), dpi=130)
-    fig.patch.set_facecolor("#0b1420")
-    _style_ax(ax, title)
+    ax.set_title(title, color="#d4e9f7", fontsize=13, pad=10)
     ax.plot(s.index, s.values, color="#93c5fd", linewidth=2.2)
     fig.tight_layout()
-    fig.savefig(OUT / fn, facecolor=fig.get_facecolor(), bbox_inches="tight")
+    fig.savefig(OUT / fn, facecolor=fig.get_facecolor(), bbox_inches="tight",
+                pil_kwargs={"compress_level": 3})
     plt.close(fig)
 
 def main():
@@ -31,12 +42,16 @@ def main():
     if not csv.exists():
         print("no levels csv")
         return
-    levels = pd.read_csv(csv, index_col=0, squeeze=True)
-    if isinstance(levels, pd.DataFrame):
-        levels = levels.iloc[:,0]
-    plot_range(levels, 7,   "skytech_3_7d.png", "SKYTECH-3 | 7日")
-    plot_range(levels, 30,  "skytech_3_1m.png", "SKYTECH-3 | 1ヶ月")
-    plot_range(levels, 365, "skytech_3_1y.png", "SKYTECH-3 | 1年")
+    levels = pd.read_csv(
+        csv, index_col=0, parse_dates=[0], date_format="%Y-%m-%d",
+        dtype={"level": "float32"},
+    ).iloc[:, 0].sort_index()
+    if levels.empty:
+        return
+    # 3レンジは互いに独立なので別プロセスで並列に描画
+    days, fns, titles = zip(*RANGES)
+    with ProcessPoolExecutor(max_workers=len(RANGES)) as ex:
+        list(ex.map(plot_range, repeat(levels), days, fns, titles))
 
 if __name__ == "__main__":
     main()
@@ -1,13 +1,11 @@
 # src/skytech_snapshot.py  (tz-safe 版)
-import json, os
+import hashlib, json, os
 from datetime import datetime, timezone
-import pytz
+from zoneinfo import ZoneInfo
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import yfinance as yf
 
-JST = pytz.timezone("Asia/Tokyo")
+JST = ZoneInfo("Asia/Tokyo")
 OUT = "docs/outputs"
 os.makedirs(OUT, exist_ok=True)
 
@@ -20,6 +18,19 @@ JP_TICKERS = {
 DISPLAY_CODES = list(JP_TICKERS.keys())
 YF_TICKERS = list(JP_TICKERS.values())
 
+# ダークテーマ（Axes ごとに設定せず rcParams で一括適用）
+CHART_RC = {
+    "figure.facecolor": "#0b1420",
+    "axes.facecolor": "#0b1420",
+    "axes.edgecolor": "#223447",
+    "axes.labelcolor": "#cfe6f3",
+    "xtick.color": "#cfe6f3",
+    "ytick.color": "#cfe6f3",
+    "axes.grid": True,
+    "grid.alpha": 0.15,
+    "grid.color": "#4b5b6b",
+}
+
 def jst_now():
     return datetime.now(JST)
 
@@ -31,6 +42,13 @@ def ensure_utc_index(idx) -> pd.DatetimeIndex:
     return di.tz_convert("UTC")
 
 def fetch_intraday_5m(tickers: list[str], days: int = 5) -> pd.DataFrame:
+    """
+    全銘柄の5分足を1回の yf.download でまとめて取得（銘柄ごとのループはしない）。
+    休場日のフォールバック用に days 日分を取得し、対象日の絞り込みは pandas 側で行う。
+    戻り値: 列が (ticker, field) の MultiIndex な DataFrame
+    """
+    import yfinance as yf  # 重いので必要になるまで読み込まない
+
     df = yf.download(
         tickers=" ".join(tickers),
         period=f"{days}d",
@@ -43,64 +61,81 @@ def fetch_intraday_5m(tickers: list[str], days: int = 5) -> pd.DataFrame:
     )
     if isinstance(df.columns, pd.MultiIndex):
         return df
-    # 単一銘柄時は MultiIndex 化
-    return pd.concat({tickers[0]: df}, axis=1)
+    # 単一銘柄時は MultiIndex 化（concat せず列ラベルだけ付け替える）
+    df.columns = pd.MultiIndex.from_product([[tickers[0]], df.columns])
+    return df
 
 def build_today_pct(df_raw: pd.DataFrame) -> tuple[pd.DataFrame, float, datetime]:
     """
     当日(JST)の寄り付き比%の等金額加重を作成。
     戻り値: (pct_df[["pct"]], last_pct, use_date_jst)
     """
-    # UTC→JST への安全変換
-    utc_index = ensure_utc_index(df_raw.index)
-    jst_index = utc_index.tz_convert(JST)
-    df_raw = df_raw.copy()
-    df_raw.index = jst_index
-
-    today = jst_now().date()
-    date_candidates = sorted({ts.date() for ts in df_raw.index})
-    use_date = today if today in date_candidates else (date_candidates[-1] if date_candidates else today)
-
-    frames = []
-    for disp, yf_t in JP_TICKERS.items():
-        col = (yf_t, "Close")
-        if col not in df_raw.columns:
-            continue
-        s = df_raw[col].dropna()
-        s = s[s.index.date == use_date]
-        if s.empty:
-            continue
-        open_px = float(s.iloc[0])
-        pct = (s / open_px - 1.0) * 100.0
-        frames.append(pct.rename(disp))
-
-    if not frames:
+    # UTC→JST への安全変換（以降は tz-aware な DatetimeIndex のまま扱う）
+    jst_index = ensure_utc_index(df_raw.index).tz_convert(JST)
+
+    # 日付の候補は正規化済みインデックスから一括で求め、対象日のマスクも1回だけ作る
+    day_index = jst_index.floor("D")
+    dates = day_index.unique()
+    today = pd.Timestamp.now(tz=JST).floor("D")
+    if today in dates:
+        use_day = today
+    else:
+        use_day = dates.max() if len(dates) else today
+    mask = day_index == use_day
+
+    # 列=ティッカーの終値テーブル（構成銘柄以外・全欠損の行/列は落とす）
+    closes = df_raw.xs("Close", axis=1, level=1).reindex(columns=YF_TICKERS)
+    closes = closes.set_axis(jst_index).loc[mask]
+    closes = closes.dropna(how="all").dropna(axis=1, how="all")
+    if closes.empty:
         raise RuntimeError("no intraday data for JP tickers")
 
-    wide = pd.concat(frames, axis=1)
-    avg = wide.mean(axis=1, skipna=True).to_frame("pct")
-    last_pct = float(avg.iloc[-1])
-    return avg, last_pct, datetime.combine(use_date, datetime.min.time(), tzinfo=JST)
+    # (時刻 x 銘柄) の2次元配列で寄り付き比%を一括計算し、等金額平均をとる
+    arr = closes.to_numpy(dtype=np.float64)
+    open_row = closes.bfill().iloc[0].to_numpy(dtype=np.float64)  # 各銘柄の最初の有効値
+    pct = (arr / open_row - 1.0) * 100.0
+    avg64 = np.nanmean(pct, axis=1)
+    # 見出しの騰落率は float64 のまま丸める（float32 だと小数2桁の丸めがずれ得る）
+    last_pct = float(avg64[-1])
+    # 系列は小数2桁で十分なので float32 で保持（プロット・CSV 書き出しの転送量を半減）
+    avg = pd.DataFrame({"pct": avg64.astype(np.float32)}, index=closes.index)
+    return avg, last_pct, use_day.to_pydatetime()
+
+def data_hash(df_raw: pd.DataFrame) -> str:
+    """取得した終値（時刻・銘柄を含む）の SHA256。前回と同じなら再生成をスキップする。"""
+    closes = df_raw.xs("Close", axis=1, level=1)
+    h = hashlib.sha256()
+    h.update(",".join(map(str, closes.columns)).encode("utf-8"))
+    h.update(ensure_utc_index(closes.index).asi8.tobytes())
+    h.update(np.ascontiguousarray(closes.to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+def load_prev_hash() -> str | None:
+    try:
+        with open(os.path.join(OUT, "skytech_3_stats.json"), encoding="utf-8") as f:
+            return json.load(f).get("data_hash")
+    except (OSError, ValueError):
+        return None
 
 def save_chart(avg_pct: pd.DataFrame, last_pct: float, data_date_jst: datetime):
+    import matplotlib.pyplot as plt  # 「データ変化なし」で終わる回では読み込まない
+
+    plt.rcParams.update(CHART_RC)
     fig = plt.figure(figsize=(12, 6), dpi=150)
     ax = fig.add_subplot(111)
-    # ダークテーマ
-    ax.set_facecolor("#0b1420"); fig.patch.set_facecolor("#0b1420")
-    ax.tick_params(colors="#cfe6f3")
-    for s in ax.spines.values(): s.set_color("#223447")
 
     ax.plot(avg_pct.index, avg_pct["pct"], lw=2.2, color="#8ce7e7")
     fillc = "#34d399" if last_pct >= 0 else "#fb7185"
     ax.fill_between(avg_pct.index, avg_pct["pct"], 0, alpha=0.18, color=fillc)
 
-    ax.set_ylabel("Change vs Open (%)", color="#cfe6f3")
+    ax.set_ylabel("Change vs Open (%)")
     ax.set_title(f"SKYTECH-3 Intraday Snapshot ({data_date_jst.strftime('%Y/%m/%d')} JST)",
                  color="#d9f0ff", fontsize=13, pad=10)
-    ax.grid(True, alpha=0.15, color="#4b5b6b")
     fig.tight_layout()
+    # PNG は zlib レベル3で書き出し（既定の6より大幅に速く、サイズ差は小さい）
     fig.savefig(os.path.join(OUT, "skytech_3_intraday.png"),
-                facecolor=fig.get_facecolor(), edgecolor="none")
+                facecolor=fig.get_facecolor(), edgecolor="none",
+                pil_kwargs={"compress_level": 3})
     plt.close(fig)
 
 def save_csv(avg_pct: pd.DataFrame):
@@ -108,15 +143,19 @@ def save_csv(avg_pct: pd.DataFrame):
     df = avg_pct.copy()
     df.index = pd.DatetimeIndex(df.index).tz_convert(JST)
     df.index.name = "datetime_jst"
-    df.to_csv(out_csv, float_format="%.6f")
+    df.to_csv(out_csv, float_format="%.4f")
+    # チャート側の読み込み用（型・tz を保持したまま再パース不要で読める）
+    df.to_parquet(os.path.join(OUT, "skytech_3_intraday.parquet"),
+                  engine="pyarrow", compression="zstd")
 
-def save_stats(last_pct: float):
+def save_stats(last_pct: float, digest: str):
     payload = {
         "key": "SKYTECH-3",
         "pct_intraday": round(last_pct, 2),
         "updated_at": jst_now().strftime("%Y/%m/%d %H:%M"),
         "unit": "pct",
         "tickers": DISPLAY_CODES,
+        "data_hash": digest,
     }
     with open(os.path.join(OUT, "skytech_3_stats.json"), "w", encoding="utf-8") as f:
         json.dump(payload, f, ensure_ascii=False, indent=2)
@@ -139,11 +178,17 @@ def save_heartbeat():
 def main():
     os.makedirs(OUT, exist_ok=True)
     df_raw = fetch_intraday_5m(YF_TICKERS, days=5)
+    h = data_hash(df_raw)
+    if h == load_prev_hash():
+        # 前回から入力が変わっていない（夜間・休場日など）→ 心拍のみ更新
+        save_heartbeat()
+        return
     avg, last_pct, use_date = build_today_pct(df_raw)
     save_chart(avg, last_pct, use_date)
     save_csv(avg)
-    save_stats(last_pct)
     save_post_text(last_pct)
+    # data_hash を含む stats は最後に書く（途中で失敗した回をスキップ判定に残さない）
+    save_stats(last_pct, h)
     save_heartbeat()
 
 if __name__ == "__main__":